@@ -1,180 +1,371 @@
-from typing import List, Tuple
+import argparse
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
 from pathlib import Path
 
+try:
+    import numpy as np
+    from numba import config as numba_config, get_num_threads, njit, prange, set_num_threads
+except ImportError:  # Numba is optional, resolution falls back to the pure Python loop
+    np = None
+    njit = None
+    prange = range
 
-# ==============================CLASSES==============================
-class Literal:
-    """
-    A literal is a symbol that may be negated or unnegated
-    """
+try:
+    from pysat.solvers import Glucose3
+except ImportError:  # PySAT is optional, only needed by KnowledgeBase.entails_pysat
+    Glucose3 = None
 
-    def __init__(self, symbol: str, negated: bool):
-        self.symbol = symbol
-        self.negated = negated
+# Clause bitmasks are packed in 64-bit words for the JIT kernel, one bit per symbol
+JIT_MAX_SYMBOLS = 64
 
-    def __repr__(self):
-        return "-" + self.symbol if self.negated else self.symbol
+# Below this many clauses a round is resolved by a single thread, as starting the others costs more
+PARALLEL_MIN_CLAUSES = 256
 
-    # Override ==, hash, < to make Literal objects become hashable
-    # and be able to used in set, sorted...
-    def __eq__(self, other):
-        return self.symbol == other.symbol and self.negated == other.negated
+# A literal is a symbol name, optionally negated with a leading '-', and the 'OR' between literals is skipped
+LITERAL_PATTERN = re.compile(r"-?\b(?!OR\b)[A-Za-z_]\w*")
 
-    def __hash__(self):
-        representation = "-" + self.symbol if self.negated else self.symbol
-        return hash(representation)
-
-    def __lt__(self, other):
-        """
-        - Sort literals
-        - Eg: A < -A, A < B, -A < B
-        """
-        if self.symbol != other.symbol:
-            return self.symbol < other.symbol
-        return self.negated < other.negated
-
-    def negate(self):
-        self.negated = not self.negated
+# ==============================CLASSES==============================
+def iter_bits(mask: int) -> Iterator[int]:
+    """
+    - Yield each set bit of a bitmask, lowest first
+    - Eg: 0b1010 -> 0b10, 0b1000
+    """
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
 
-    def is_complement(self, other) -> bool:
-        return self.negated != other.negated and self.symbol == other.symbol
 
-    @staticmethod
-    def parse(literal_str):
-        """
-        - Parse a string to a literal
-        - Eg: '-A' -> Literal('A', True)
-        """
-        if literal_str[0] == "-":
-            return Literal(literal_str[1], True)
-        else:
-            return Literal(literal_str[0], False)
+def literal_key(literal: int) -> Tuple[int, bool]:
+    """
+    - Sort literals by symbol, unnegated before negated
+    - Eg: 1 < -1, 1 < 2, -1 < 2
+    """
+    return abs(literal), literal < 0
 
 
+@dataclass(frozen=True, slots=True)
 class Clause:
     """
-    A clause is a disjunction of literals
+    - A clause is a disjunction of literals
+    - Stored as 2 bitmasks: 'pos' holds the unnegated symbols, 'neg' holds the negated symbols
+    - Eg: 'A OR -C' -> Clause(pos=0b001, neg=0b100) (with symbol_table = {'A': 1, 'B': 2, 'C': 3})
     """
 
-    def __init__(self):
-        self.literals = []
+    pos: int = 0
+    neg: int = 0
+    _hash: int = field(init=False, repr=False, compare=False)
 
-    def __repr__(self):
-        if len(self.literals) != 0:
-            return " OR ".join(str(literal) for literal in self.literals)
-        else:
-            return "{}"
+    def __post_init__(self):
+        # Clauses are immutable and hashed on every set operation, so the hash is computed once
+        object.__setattr__(self, "_hash", hash((self.pos, self.neg)))
+
+    def __hash__(self):
+        return self._hash
 
-    # Override ==, hash, < to make Clause objects become hashable
-    # and be able to used in set, sorted...
     def __eq__(self, other):
-        return set(self.literals) == set(other.literals)
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        if self._hash != other._hash:
+            return False
+        return self.pos == other.pos and self.neg == other.neg
 
-    def __hash__(self):
-        return hash(tuple(self.literals))
+    def __len__(self):
+        return self.pos.bit_count() + self.neg.bit_count()
 
     def __lt__(self, other):
         """
         - Sort clauses
-        - Priority: length of literals -> literals
+        - Priority: length of literals -> literals, see literal_key (symbols compare by index in the symbol table)
         - Eg:
             - 'A OR B' < 'A OR B OR C'
             - 'A OR B' < 'A OR C'
         """
-        if len(self.literals) != len(other.literals):
-            return len(self.literals) < len(other.literals)
-        for i in range(len(self.literals)):
-            if self.literals[i] != other.literals[i]:
-                return self.literals[i] < other.literals[i]
-        return False
+        if len(self) != len(other):
+            return len(self) < len(other)
+        return [literal_key(literal) for literal in self.literals()] < [
+            literal_key(literal) for literal in other.literals()
+        ]
 
-    def is_empty(self):
-        return len(self.literals) == 0
-
-    def add_literal(self, literal: Literal):
-        self.literals.append(literal)
-
-    def refactor(self):
+    def literals(self) -> List[int]:
         """
-        Remove duplicates and sort
+        - Return the literals as signed ints, sorted by symbol, unnegated before negated
+        - Eg: Clause(pos=0b001, neg=0b101) -> [1, -1, -3]
         """
-        self.literals = sorted(set(self.literals))
-
-    def is_always_true(self) -> bool:
+        # Walking the bits of 'pos | neg' lowest first already gives the sorted order
+        literals = []
+        for bit in iter_bits(self.pos | self.neg):
+            if self.pos & bit:
+                literals.append(bit.bit_length())
+            if self.neg & bit:
+                literals.append(-bit.bit_length())
+        return literals
+
+    def to_str(self, symbols: List[str]) -> str:
         """
-        - Check if a clause is always true, the clause was sorted
-        - Eg: 'A OR -A OR B' = 'TRUE OR A' = 'TRUE'
+        - Convert a clause to a string, symbols[idx] is the name of symbol idx
+        - Literals are ordered by name, unnegated before negated
+        - Eg: Clause(pos=0b01, neg=0b10) -> 'A OR -B' (with symbols = ['', 'A', 'B'])
         """
-        for i in range(len(self.literals) - 1):
-            if self.literals[i].is_complement(self.literals[i + 1]):
-                return True
-        return False
+        if self.is_empty():
+            return "{}"
+        names = sorted((symbols[abs(literal)], literal < 0) for literal in self.literals())
+        return " OR ".join("-" + name if negated else name for name, negated in names)
+
+    def is_empty(self):
+        return self.pos == 0 and self.neg == 0
 
-    def merge(self, other: "Clause") -> "Clause":
+    def subsumes(self, other: "Clause") -> bool:
         """
-        - Merge 2 clauses
-        - Eg: 'A OR B', '-A OR C' => 'B OR C'
+        - Check if every literal of the clause is also in the other clause
+        - Eg: 'A OR -B' subsumes 'A OR -B OR C'
         """
-        new_clause = Clause()
-        new_clause.literals = self.literals + other.literals
-        new_clause.refactor()
-        return new_clause
+        return (self.pos & other.pos) == self.pos and (self.neg & other.neg) == self.neg
 
-    def clone_without(self, literal: Literal) -> "Clause":
+    def is_always_true(self) -> bool:
         """
-        - Clone clause without a literal
-        - Eg: 'A OR B OR C' without 'A' => 'B OR C'
+        - Check if a clause is always true, i.e. a symbol is both unnegated and negated
+        - Eg: 'A OR -A OR B' = 'TRUE OR A' = 'TRUE'
         """
-        new_clause = Clause()
-        for l in self.literals:
-            if l != literal:
-                new_clause.add_literal(l)
-        new_clause.refactor()
-        return new_clause
+        return (self.pos & self.neg) != 0
 
-    @staticmethod
-    def parse(clause_str):
+    def _resolvent(self, other: "Clause", bit: int) -> "Clause":
         """
-        - Parse a string to a clause
-        - Eg: 'A OR B OR -C' -> Clause([Literal('A', False), Literal('B', False), Literal('C', True)])
+        - Resolve on a symbol bit that is unnegated in the clause and negated in the other clause
+        - Same as removing the symbol from each side and merging the rest, in a single clause
+        - Eg: 'A OR B', '-A OR C' on 'A' => 'B OR C'
         """
-        clause = Clause()
-        for literal_str in clause_str.split(" OR "):
-            literal_str = literal_str.strip()
-            clause.add_literal(Literal.parse(literal_str))
-        clause.refactor()
-        return clause
+        return Clause((self.pos & ~bit) | other.pos, self.neg | (other.neg & ~bit))
 
     def pl_resolve(self, other: "Clause"):
         """
         - Return the set of all possible resolvents and a boolean value to check if there is an empty clause
+        - Complementary symbols are the bits of 'self.pos & other.neg' and 'self.neg & other.pos'
+        - Resolving on one of them keeps the others, so with 2 or more the resolvents are always true
         - Eg: 'A OR B OR C', '-A OR D OR -C'
             - 'A' is complement of '-A' => resolvent = 'B OR C OR -C OR D' = TRUE => discard
             - 'C' is complement of '-C' => resolvent = 'A OR B OR -B OR D' = TRUE => discard
             - Result: resolvents = {}, has_empty_clause = FALSE
         """
-        resolvents = set()
-        has_empty_clause = False
+        bit = (self.pos & other.neg) | (self.neg & other.pos)
+        if bit == 0 or bit & (bit - 1) != 0:
+            return set(), False
+
+        if self.pos & other.neg:
+            resolvent = self._resolvent(other, bit)
+        else:
+            resolvent = other._resolvent(self, bit)
+        if resolvent.is_always_true():
+            return set(), False
+        return {resolvent}, resolvent.is_empty()
+
+
+class ClauseIndex:
+    """
+    - A set of clauses indexed for resolution and subsumption
+    - by_pos[bit] / by_neg[bit]: clauses containing the symbol bit unnegated / negated
+    - by_literal=False keeps only the set, for the JIT kernel that resolves every pair without the literal sets
+    """
+
+    def __init__(self, by_literal: bool = True):
+        self.clauses: Set[Clause] = set()
+        self.by_literal = by_literal
+        self.by_pos: Dict[int, Set[Clause]] = defaultdict(set)
+        self.by_neg: Dict[int, Set[Clause]] = defaultdict(set)
+
+    def __contains__(self, clause: Clause):
+        return clause in self.clauses
+
+    def __iter__(self):
+        return iter(self.clauses)
+
+    def __len__(self):
+        return len(self.clauses)
+
+    def add(self, clause: Clause):
+        self.clauses.add(clause)
+        if not self.by_literal:
+            return
+        for bit in iter_bits(clause.pos):
+            self.by_pos[bit].add(clause)
+        for bit in iter_bits(clause.neg):
+            self.by_neg[bit].add(clause)
+
+    def update(self, clauses: Iterable[Clause]):
+        if not self.by_literal:
+            self.clauses.update(clauses)
+            return
+        for clause in clauses:
+            self.add(clause)
+
+    def remove(self, clause: Clause):
+        self.clauses.discard(clause)
+        if not self.by_literal:
+            return
+        for bit in iter_bits(clause.pos):
+            self.by_pos[bit].discard(clause)
+        for bit in iter_bits(clause.neg):
+            self.by_neg[bit].discard(clause)
+
+    def clashing(self, clause: Clause) -> Set[Clause]:
+        """
+        Return the clauses holding a literal complementary to a literal of the clause
+        """
+        candidates = set()
+        for bit in iter_bits(clause.pos):
+            candidates.update(self.by_neg[bit])
+        for bit in iter_bits(clause.neg):
+            candidates.update(self.by_pos[bit])
+        return candidates
+
+
+class SubsumptionIndex(ClauseIndex):
+    """
+    - A ClauseIndex that never holds a clause subsumed by another one, see add_unsubsumed
+    - by_head[(literal, length)]: clauses of that length whose first literal (see Clause.literals) is 'literal'
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.by_head: Dict[Tuple[int, int], Set[Clause]] = defaultdict(set)
+
+    @staticmethod
+    def head(clause: Clause) -> Tuple[int, int]:
+        bit = (clause.pos | clause.neg) & -(clause.pos | clause.neg)
+        literal = bit.bit_length() if clause.pos & bit else -bit.bit_length()
+        return literal, len(clause)
+
+    def add(self, clause: Clause):
+        super().add(clause)
+        self.by_head[self.head(clause)].add(clause)
+
+    def remove(self, clause: Clause):
+        super().remove(clause)
+        self.by_head[self.head(clause)].discard(clause)
+
+    def add_unsubsumed(self, clause: Clause) -> bool:
+        """
+        - Add a clause unless an indexed clause subsumes it, and remove the indexed clauses it subsumes
+        - Return True if the clause was added
+        - Eg: 'A' subsumes 'A OR B', so adding 'A OR B' after 'A' is skipped and adding 'A' after 'A OR B' removes it
+        """
+        # A clause subsuming 'clause' starts with one of its literals and holds only literals that come after it,
+        # so it is in exactly one of these buckets and longer clauses are never tested
+        literals = clause.literals()
+        for n, literal in enumerate(literals):
+            for length in range(1, len(literals) - n + 1):
+                bucket = self.by_head.get((literal, length), ())
+                if any(other.subsumes(clause) for other in bucket):
+                    return False
+
+        # A clause subsumed by 'clause' holds all of its literals, so it is in its smallest literal set
+        buckets = [self.by_pos[bit] for bit in iter_bits(clause.pos)]
+        buckets += [self.by_neg[bit] for bit in iter_bits(clause.neg)]
+        subsumed = min(buckets, key=len) if buckets else self.clauses
+        for other in [other for other in subsumed if clause.subsumes(other)]:
+            self.remove(other)
+        self.add(clause)
+        return True
+
+
+def resolve_masks(pos1, neg1, pos2, neg2):
+    """
+    - Resolve 2 clauses given as (pos, neg) bitmasks, see Clause.pl_resolve for the same steps on Clause objects
+    - Return the resolvent, or (-1, -1), a tautology, if the clauses do not clash on exactly one symbol
+    """
+    bit = (pos1 & neg2) | (neg1 & pos2)
+    if bit == 0 or (bit & (bit - 1)) != 0:
+        return -1, -1
+    if (pos1 & neg2) != 0:
+        return (pos1 & ~bit) | pos2, neg1 | (neg2 & ~bit)
+    return pos1 | (pos2 & ~bit), (neg1 & ~bit) | neg2
 
-        for literal1 in self.literals:
-            for literal2 in other.literals:
-                if literal1.is_complement(literal2):
-                    clause1 = self.clone_without(literal1)
-                    clause2 = other.clone_without(literal2)
-                    resolvent = clause1.merge(clause2)
 
-                    if resolvent.is_always_true():
-                        continue
-                    if resolvent.is_empty():
-                        has_empty_clause = True
-                    resolvents.add(resolvent)
+def resolve_block(clauses, num_frontier):
+    """
+    - Resolve clauses[i] with each clauses[j], j > i, for i < num_frontier
+    - clauses: int64 array of (pos, neg) rows, the frontier rows come first
+    - Return an int64 array of (pos, neg) resolvents, tautologies are discarded and duplicates are kept
+    - Compiled with Numba when available. The rows i are shared out between the Numba threads: each row
+      is resolved twice, once to count its resolvents and once to write them to its own slice of the output
+    """
+    counts = np.zeros(num_frontier + 1, dtype=np.int64)
+    for i in prange(num_frontier):
+        count = 0
+        for j in range(i + 1, clauses.shape[0]):
+            pos, neg = resolve_masks(clauses[i, 0], clauses[i, 1], clauses[j, 0], clauses[j, 1])
+            if (pos & neg) == 0:
+                count += 1
+        counts[i + 1] = count
+
+    starts = np.cumsum(counts)
+    resolvents = np.empty((starts[-1], 2), dtype=np.int64)
+    for i in prange(num_frontier):
+        k = starts[i]
+        for j in range(i + 1, clauses.shape[0]):
+            pos, neg = resolve_masks(clauses[i, 0], clauses[i, 1], clauses[j, 0], clauses[j, 1])
+            if (pos & neg) == 0:
+                resolvents[k, 0] = pos
+                resolvents[k, 1] = neg
+                k += 1
+    return resolvents
+
+
+def unique_rows(rows):
+    """
+    - Drop the repeated rows of an int64 array of (pos, neg) rows, keeping the first of each
+    - Compiled with Numba when available, np.unique(rows, axis=0) is several times slower as it sorts the rows
+    """
+    seen = set()
+    unique = np.empty_like(rows)
+    count = 0
+    for k in range(rows.shape[0]):
+        row = (rows[k, 0], rows[k, 1])
+        if row not in seen:
+            seen.add(row)
+            unique[count] = rows[k]
+            count += 1
+    return unique[:count]
+
+
+if njit is not None:
+    resolve_masks = njit(cache=True)(resolve_masks)
+    resolve_block = njit(cache=True, parallel=True)(resolve_block)
+    unique_rows = njit(cache=True)(unique_rows)
+
 
-        return resolvents, has_empty_clause
+def to_array(clauses: Iterable[Clause]):
+    """
+    - Pack clauses into an int64 array of (pos, neg) rows for resolve_block
+    - Masks are packed as uint64 and reinterpreted, so symbol 64 is the int64 sign bit
+    """
+    return np.array([(clause.pos, clause.neg) for clause in clauses], dtype=np.uint64).reshape(-1, 2).view(np.int64)
+
+
+def resolve_jit(clauses: List[Clause], num_frontier: int, threads: int) -> Set[Clause]:
+    """
+    - Resolve clauses[i] with each clauses[j], j > i, for i < num_frontier with the JIT kernel, see resolve_block
+    - The frontier clauses come first, so every unordered pair with a frontier clause is resolved once
+    - threads: number of Numba threads, at most the NUMBA_NUM_THREADS the threads were started with
+    """
+    previous_threads = get_num_threads()
+    set_num_threads(max(1, min(threads, numba_config.NUMBA_NUM_THREADS)))
+    try:
+        resolvents = resolve_block(to_array(clauses), num_frontier)
+    finally:
+        set_num_threads(previous_threads)
+    # Most resolvents are derived several times, dedupe the rows before building a Clause for each
+    resolvents = unique_rows(resolvents)
+    return {Clause(pos, neg) for pos, neg in resolvents.view(np.uint64).tolist()}
 
 
 class KnowledgeBase:
     def __init__(self):
         self.clauses = []
+        self.symbol_table: Dict[str, int] = {}  # symbol name -> index, starting at 1
 
     def add_clause(self, clause: Clause):
         self.clauses.append(clause)
@@ -183,60 +374,160 @@ class KnowledgeBase:
     def parse(clauses: List[str]) -> "KnowledgeBase":
         kb = KnowledgeBase()
         for clause_str in clauses:
-            clause = Clause.parse(clause_str)
-            clause.refactor()
+            clause = kb.parse_clause(clause_str)
             kb.add_clause(clause)
         return kb
 
-    def pl_resolution(self, alpha: str) -> Tuple[bool, List[List[str]]]:
+    def symbol_bit(self, symbol: str) -> int:
+        """
+        - Return the bit of a symbol in clause bitmasks, unseen symbols are added to the symbol table
+        - Symbol idx is bit idx - 1, eg: 'C' -> 0b100 (with symbol_table = {'A': 1, 'B': 2, 'C': 3})
+        """
+        return 1 << (self.symbol_table.setdefault(symbol, len(self.symbol_table) + 1) - 1)
+
+    def parse_clause(self, clause_str: str) -> Clause:
+        """
+        - Parse a string to a clause, literals are matched by LITERAL_PATTERN
+        - Raise ValueError if the literals do not make up the whole string, eg: '1 OR 2', 'A OR ~B'
+        - Eg: 'A OR B OR -C' -> Clause(pos=0b011, neg=0b100)
+        """
+        tokens = LITERAL_PATTERN.findall(clause_str)
+        if not tokens or " OR ".join(tokens) != " ".join(clause_str.split()):
+            raise ValueError(f"Invalid clause: {clause_str!r}")
+
+        pos = neg = 0
+        for token in tokens:
+            if token[0] == "-":
+                neg |= self.symbol_bit(token[1:])
+            else:
+                pos |= self.symbol_bit(token)
+        return Clause(pos, neg)
+
+    def negate(self, alpha: str) -> List[Clause]:
+        """
+        - Negate a clause and convert it to CNF, i.e. one unit clause per negated literal
+        - Eg: 'A OR -B' => ['-A', 'B']
+        """
+        alpha_clause = self.parse_clause(alpha)
+        negated_alpha = [Clause(0, bit) for bit in iter_bits(alpha_clause.pos)]
+        negated_alpha += [Clause(bit, 0) for bit in iter_bits(alpha_clause.neg)]
+        return negated_alpha
+
+    def entails_pysat(self, alpha: str) -> bool:
+        """
+        - Check if alpha is entailed by KB with a CDCL SAT solver (PySAT's Glucose3): KB AND -alpha is unsatisfiable
+        - Literals are already signed symbol indices, i.e. the DIMACS encoding the solver takes
+        - Much faster than pl_resolution on large KBs, but gives no list of new clauses
+        """
+        if Glucose3 is None:
+            raise ImportError("entails_pysat requires PySAT: pip install python-sat")
+        clauses = [clause.literals() for clause in self.clauses + self.negate(alpha)]
+        with Glucose3(bootstrap_with=clauses) as solver:
+            return not solver.solve()
+
+    def symbols(self) -> List[str]:
+        """
+        Reverse symbol table: symbols[idx] is the name of symbol idx
+        """
+        symbols = [""] * (len(self.symbol_table) + 1)
+        for symbol, idx in self.symbol_table.items():
+            symbols[idx] = symbol
+        return symbols
+
+    def pl_resolution(
+        self,
+        alpha: str,
+        subsumption: bool = False,
+        sink: Optional[Callable[[int, Set[Clause]], None]] = None,
+        workers: int = 1,
+    ) -> Tuple[bool, List[Set[Clause]]]:
         """
         - PL resolution algorithm
-        - Return a boolean value to check if alpha is entailed by KB and a list of new clauses
+        - Return a boolean value to check if alpha is entailed by KB and a list of new clauses of each round
         - alpha: a string represents a clause. We need to negate it before adding to KB, i.e. negate each literal and convert to CNF clause
             - Eg: 'A OR B' => '-A AND -B'
+        - subsumption: discard new clauses subsumed by a kept clause and remove the kept clauses they subsume.
+          The answer is the same, but the list of new clauses is no longer every resolvent
+        - sink: if given, called with (round index, new clauses) as each round finishes instead of keeping
+          the new clauses of all rounds, the returned list is then empty. This only saves the output sets:
+          every derived clause is still kept to check the next resolvents against, so memory still grows
+          with the total number of clauses (with subsumption, the clauses not subsumed)
+        - workers: number of threads the JIT kernel resolves a round of at least PARALLEL_MIN_CLAUSES clauses with,
+          defaults to 1. The new clauses are the same for any number of workers. Only the kernel runs in
+          parallel, building the new clauses does not, and without Numba every round is resolved by the Python loop
         """
         # 1. Create 'clauses' is a set of clauses of KB and -alpha
-        clauses = self.clauses.copy()
-        alpha_literals = alpha.split(" OR ")
-        for literal_str in alpha_literals:
-            literal_str = literal_str.strip()
-            literal = Literal.parse(literal_str)
-            literal.negate()
-            clause = Clause()
-            clause.add_literal(literal)
-            if clause not in clauses:  # Remove duplicate clauses
-                clauses.append(clause)
+        clauses = set(self.clauses)
+        clauses.update(self.negate(alpha))  # Duplicate clauses are removed by the set
 
         # 2. Loop
-        clauses = set(clauses)
+        # The JIT kernel resolves the frontier against every clause, bitmasks must fit in int64
+        use_jit = njit is not None and len(self.symbol_table) <= JIT_MAX_SYMBOLS
+
+        if subsumption:
+            index = SubsumptionIndex()
+            for clause in sorted(clauses, key=len):
+                index.add_unsubsumed(clause)
+        else:
+            # Only the Python loop looks clauses up by literal
+            index = ClauseIndex(by_literal=not use_jit)
+            index.update(clauses)
         output = []  # output is a list of new clauses
-        is_unsatisfiable = False
+        if sink is None:
+            sink = lambda _, new_clauses: output.append(new_clauses)
+        num_rounds = 0
+
+        # Pairs of old clauses were resolved in previous rounds, so only the clauses added in the last round
+        # (the frontier) need to be resolved, and only against the clauses holding a complementary literal
+        frontier = set(index)
 
         while True:
-            # 2.1. Loop through all pairs of clauses and resolve them
-            new_clauses = set()
-            for clause1 in clauses:
-                for clause2 in clauses:
-                    resolvents, has_empty_clause = clause1.pl_resolve(clause2)
-                    new_clauses.update(resolvents)
-                    if has_empty_clause:
-                        is_unsatisfiable = True
-                        break
-
-            # Create a set of new clauses that are not in the 'clauses' set to the 'output' list
-            output.append(new_clauses.difference(clauses))
-
-            # 2.2. Check if there is an empty clause or no new clause
+            # 2.1. The empty clause is only derived from 2 complementary unit clauses, so this round derives it
+            # if a unit clause of the frontier has its complement in 'clauses'. The round then stops early by
+            # resolving only these unit clauses, the same clauses whatever order the frontier is visited in
+            units = {clause for clause in frontier if len(clause) == 1 and Clause(clause.neg, clause.pos) in index}
+            is_unsatisfiable = len(units) > 0
+            if is_unsatisfiable:
+                frontier = units
+
+            # 2.2. Loop through the frontier and resolve each clause with the clauses it clashes with,
+            # keeping only the resolvents that are not in the 'clauses' set yet
+            if use_jit:
+                # The frontier comes first in 'clause_list', see resolve_jit
+                clause_list = [*frontier, *(clause for clause in index if clause not in frontier)]
+                threads = workers if len(index) >= PARALLEL_MIN_CLAUSES else 1
+                new_clauses = resolve_jit(clause_list, len(frontier), threads).difference(index.clauses)
+            else:
+                new_clauses = set()
+                # Each unordered pair is resolved once, and a clause is not resolved with itself
+                resolved = set()
+                for clause1 in frontier:
+                    resolved.add(clause1)
+                    for clause2 in index.clashing(clause1):
+                        if clause2 in resolved:
+                            continue
+                        resolvents, _ = clause1.pl_resolve(clause2)
+                        for resolvent in resolvents:
+                            if resolvent not in index:
+                                new_clauses.add(resolvent)
+
+            # 2.3. Update clauses and add the new clauses to the 'output' list
+            frontier = new_clauses
+            if subsumption:
+                frontier = {clause for clause in sorted(frontier, key=len) if index.add_unsubsumed(clause)}
+            else:
+                index.update(frontier)
+            sink(num_rounds, frontier)
+            num_rounds += 1
+
+            # 2.4. Check if there is an empty clause
             if is_unsatisfiable:
                 return True, output
 
-            # 2.3. Check if new_clauses is a subset of clauses
-            if new_clauses.issubset(clauses):
+            # 2.5. Check if new_clauses is a subset of clauses
+            if len(frontier) == 0:
                 return False, output
 
-            # 2.4. Update clauses
-            clauses.update(new_clauses)
-
 
 # ==============================I/O==============================
 def read_input(path: Path) -> Tuple[str, List[str]]:
@@ -247,20 +538,41 @@ def read_input(path: Path) -> Tuple[str, List[str]]:
     return alpha, clauses
 
 
-def write_output(path: Path, entail: bool, output_clauses: List[List[str]]):
-    with path.open(mode="w") as file:
-        for clauses in output_clauses:
-            file.write(f"{len(clauses)}\n")
-            for clause in clauses:
-                file.write(f"{clause}\n")
-        if entail == True:
-            file.write("YES")
-        else:
-            file.write("NO")
+def write_clauses(file: TextIO, clauses: Set[Clause], symbols: List[str]):
+    """
+    Write the new clauses of a round: the number of clauses, then one clause per line
+    """
+    file.write(f"{len(clauses)}\n")
+    for clause in clauses:
+        file.write(f"{clause.to_str(symbols)}\n")
+
+
+def write_answer(file: TextIO, entail: bool):
+    if entail == True:
+        file.write("YES")
+    else:
+        file.write("NO")
 
 
 # ==============================MAIN==============================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check if alpha is entailed by KB for each file in ./input")
+    parser.add_argument(
+        "--engine",
+        choices=["resolution", "pysat"],
+        default="resolution",
+        help="resolution: PL resolution, writes the new clauses of each round and the answer (default); "
+        "pysat: SAT solver, writes the answer only",
+    )
+    parser.add_argument(
+        "--subsumption",
+        action="store_true",
+        help="resolution only: drop subsumed clauses each round, same answer but fewer new clauses are written",
+    )
+    args = parser.parse_args()
+    if args.engine == "pysat" and Glucose3 is None:
+        parser.error("--engine=pysat requires PySAT: pip install python-sat")
+
     input_folder = Path("./input")
     output_folder = Path("./output")
     if not output_folder.exists():
@@ -272,5 +584,14 @@ if __name__ == "__main__":
 
         alpha, clauses = read_input(input_file)
         KB = KnowledgeBase.parse(clauses)
-        entail, output_clauses = KB.pl_resolution(alpha)
-        write_output(des, entail, output_clauses)
+        with des.open(mode="w") as file:
+            if args.engine == "pysat":
+                write_answer(file, KB.entails_pysat(alpha))
+                continue
+            # Write the new clauses of each round as soon as it finishes
+            entail, _ = KB.pl_resolution(
+                alpha,
+                subsumption=args.subsumption,
+                sink=lambda _, new_clauses: write_clauses(file, new_clauses, KB.symbols()),
+            )
+            write_answer(file, entail)